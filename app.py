@@ -1,67 +1,167 @@
+import asyncio
 import gradio as gr
 import fitz
 import google.generativeai as genai
-import json
-import matplotlib.pyplot as plt
-import time
-import numpy as np
+import orjson
+import hashlib
+from collections import OrderedDict
+from PIL import Image, ImageDraw, ImageFont
 from urllib.parse import quote
 import os
-
-def extract_text_from_pdf(pdf_file):
-    """Extracts text from an uploaded PDF file, limited to the first 5 pages."""
+import string
+import threading
+from typing import TypedDict
+
+if os.environ.get('GEMINI_API_KEY'):
+    genai.configure(api_key=os.environ['GEMINI_API_KEY'])
+
+# Static instructions are sent as the model's system instruction so each request
+# only carries the two documents.
+SYSTEM_INSTRUCTION = """
+You are a top-tier senior recruiter and career coach with 15 years of experience. Your task is to conduct a deep analysis of a resume against a job description.
+
+1.  From the job description, meticulously extract the core "jd_technical_skills" (e.g., Python, AWS, React) and "jd_soft_skills" (e.g., Leadership, Communication).
+2.  From the resume, extract all "resume_technical_skills" you can discern.
+3.  Critically compare the resume to the job description and generate a list of 2-4 highly specific, actionable "suggestions" for improving the resume. These suggestions must be insightful and go beyond simple keyword matching. For example: "The job requires 'Terraform' for infrastructure management. Your resume mentions AWS but not specific IaC tools. Consider adding a bullet point under your cloud project detailing how you automated infrastructure provisioning, even if you used a different tool."
+4.  IMPORTANT: Discard vague, non-skill phrases. Be discerning.
+5.  Return a single, clean JSON object with four keys: "jd_technical_skills", "jd_soft_skills", "resume_technical_skills", and "suggestions".
+
+Provide only the raw JSON object in your response.
+"""
+
+# Character budgets for the documents sent to Gemini; well above a real resume or JD,
+# but they stop a long PDF from inflating input tokens, latency and cost.
+MAX_RESUME_CHARS = 8000
+MAX_JD_CHARS = 6000
+
+PROMPT_TEMPLATE = string.Template("""
+Resume Text:
+---
+$resume
+---
+
+Job Description Text:
+---
+$jd
+---
+""")
+
+class SkillAnalysis(TypedDict):
+    jd_technical_skills: list[str]
+    jd_soft_skills: list[str]
+    resume_technical_skills: list[str]
+    suggestions: list[str]
+
+# JSON mode with a schema makes Gemini return bare, well-formed JSON (no code fences).
+GENERATION_CONFIG = genai.GenerationConfig(
+    response_mime_type="application/json",
+    response_schema=SkillAnalysis,
+)
+
+# Built once and shared by every request; the API client itself is created lazily on first use.
+_MODEL = genai.GenerativeModel(
+    'gemini-1.5-flash-latest',
+    system_instruction=SYSTEM_INSTRUCTION,
+    generation_config=GENERATION_CONFIG,
+)
+
+# Upper bound on in-flight Gemini requests, matching the queue's concurrency limit.
+GEMINI_CONCURRENCY = 8
+_gemini_semaphore = asyncio.Semaphore(GEMINI_CONCURRENCY)
+
+GEMINI_CACHE_SIZE = 256
+_gemini_cache = OrderedDict()
+
+def _lru_get(cache, key):
+    """Returns the cached value for key (or None) and marks it as recently used."""
+    if key not in cache:
+        return None
+    cache.move_to_end(key)
+    return cache[key]
+
+def _lru_put(cache, key, value, maxsize):
+    """Stores value under key, evicting the least recently used entries beyond maxsize."""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > maxsize:
+        cache.popitem(last=False)
+
+def _documents_key(resume_text, jd_text):
+    """Hashes the whitespace-normalised document pair so re-extractions of the same files hit the cache."""
+    digest = hashlib.blake2b()
+    digest.update(" ".join(resume_text.split()).encode())
+    digest.update(b"\0")
+    digest.update(" ".join(jd_text.split()).encode())
+    return digest.hexdigest()
+
+# PyMuPDF initialises MuPDF without locking, so documents must never be parsed on
+# two threads at once. Extraction runs in worker threads, hence the lock, which
+# also guards the extraction cache.
+_PDF_LOCK = threading.Lock()
+
+PDF_CACHE_SIZE = 64
+_pdf_cache = OrderedDict()
+
+def _file_digest(path):
+    """Returns the blake2b hex digest of a file's contents."""
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'blake2b').hexdigest()
+
+def extract_text_from_pdf(pdf_file, digest=None):
+    """
+    Extracts text from an uploaded PDF file, limited to the first 5 pages.
+    Pass the file's digest if it is already known to avoid hashing it again.
+    """
     if not pdf_file: return ""
     try:
-        doc = fitz.open(pdf_file.name)
-        text = "".join(page.get_text() for page_num, page in enumerate(doc) if page_num < 5)
+        if digest is None:
+            digest = _file_digest(pdf_file.name)
+        with _PDF_LOCK:
+            text = _lru_get(_pdf_cache, digest)
+            if text is None:
+                with fitz.open(pdf_file.name) as doc:
+                    text = "\n".join(
+                        doc[page_num].get_text("text", flags=fitz.TEXT_PRESERVE_WHITESPACE)
+                        for page_num in range(min(5, doc.page_count))
+                    )
+                _lru_put(_pdf_cache, digest, text, PDF_CACHE_SIZE)
         return text
     except Exception as e:
         return f"Error reading PDF: {e}"
 
-def analyze_with_gemini(resume_text, jd_text):
+async def analyze_with_gemini(resume_text, jd_text):
     """
     Analyzes documents with the fast and efficient Gemini 1.5 Flash model.
     """
-    api_key = os.environ.get('GEMINI_API_KEY')
-    if not api_key:
+    if not os.environ.get('GEMINI_API_KEY'):
         return False, "Error: GEMINI_API_KEY environment variable not set on the server."
 
+    resume_text = resume_text[:MAX_RESUME_CHARS].rstrip()
+    jd_text = jd_text[:MAX_JD_CHARS].rstrip()
+
+    cache_key = _documents_key(resume_text, jd_text)
+    cached = _lru_get(_gemini_cache, cache_key)
+    if cached is not None:
+        return True, cached
+
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-1.5-flash-latest')
-
-        prompt = f"""
-        You are a top-tier senior recruiter and career coach with 15 years of experience. Your task is to conduct a deep analysis of a resume against a job description.
-
-        1.  From the job description, meticulously extract the core "jd_technical_skills" (e.g., Python, AWS, React) and "jd_soft_skills" (e.g., Leadership, Communication).
-        2.  From the resume, extract all "resume_technical_skills" you can discern.
-        3.  Critically compare the resume to the job description and generate a list of 2-4 highly specific, actionable "suggestions" for improving the resume. These suggestions must be insightful and go beyond simple keyword matching. For example: "The job requires 'Terraform' for infrastructure management. Your resume mentions AWS but not specific IaC tools. Consider adding a bullet point under your cloud project detailing how you automated infrastructure provisioning, even if you used a different tool."
-        4.  IMPORTANT: Discard vague, non-skill phrases. Be discerning.
-        5.  Return a single, clean JSON object with four keys: "jd_technical_skills", "jd_soft_skills", "resume_technical_skills", and "suggestions".
-
-        Resume Text:
-        ---
-        {resume_text}
-        ---
-
-        Job Description Text:
-        ---
-        {jd_text}
-        ---
-
-        Provide only the raw JSON object in your response.
-        """
-
-        response = model.generate_content(prompt)
-        cleaned_response = response.text.strip().replace('```json', '').replace('```', '')
-        parsed_json = json.loads(cleaned_response)
-
-        jd_technical = set(skill.lower() for skill in parsed_json.get("jd_technical_skills", []))
-        jd_soft = set(skill.lower() for skill in parsed_json.get("jd_soft_skills", []))
-        resume_technical = set(skill.lower() for skill in parsed_json.get("resume_technical_skills", []))
+        prompt = PROMPT_TEMPLATE.substitute(resume=resume_text, jd=jd_text)
+
+        async with _gemini_semaphore:
+            response = await _MODEL.generate_content_async(prompt)
+        parsed_json = orjson.loads(response.text)
+
+        jd_technical = frozenset(skill.lower() for skill in parsed_json.get("jd_technical_skills", []))
+        jd_soft = frozenset(skill.lower() for skill in parsed_json.get("jd_soft_skills", []))
+        resume_technical = frozenset(skill.lower() for skill in parsed_json.get("resume_technical_skills", []))
         suggestions = parsed_json.get("suggestions", [])
 
-        return True, (jd_technical, jd_soft, resume_technical, suggestions)
+        result = (jd_technical, jd_soft, resume_technical, suggestions)
+        # A reply without JD skills is reported as a failure, so leave it uncached
+        # to let a retry reach Gemini again.
+        if jd_technical:
+            _lru_put(_gemini_cache, cache_key, result, GEMINI_CACHE_SIZE)
+        return True, result
 
     except Exception as e:
         return False, f"Gemini API Error: {str(e)}. The model may have returned an unexpected format. Please try again."
@@ -72,59 +172,60 @@ def get_learning_resources(missing_skills):
     """
     if not missing_skills:
         return ""
-    links_md = "## 📚 Learning Resources\nHere are some links to help you get started on the missing technical skills:\n\n"
-    for skill in sorted(list(missing_skills)):
-        query = quote(f"{skill} tutorial for beginners")
-        udemy_query = quote(skill)
-        links_md += f"### {skill.title()}\n* [Search on YouTube](https://www.youtube.com/results?search_query={query})\n* [Search on Udemy](https://www.udemy.com/courses/search/?q={udemy_query})\n* [Search on Coursera](https://www.coursera.org/search?query={udemy_query})\n\n"
-    return links_md
+    parts = ["## 📚 Learning Resources\nHere are some links to help you get started on the missing technical skills:\n\n"]
+    for skill in sorted(missing_skills):
+        query = quote(skill)
+        parts.append(
+            f"### {skill.title()}\n"
+            f"* [Search on YouTube](https://www.youtube.com/results?search_query={query}%20tutorial%20for%20beginners)\n"
+            f"* [Search on Udemy](https://www.udemy.com/courses/search/?q={query})\n"
+            f"* [Search on Coursera](https://www.coursera.org/search?query={query})\n\n"
+        )
+    return "".join(parts)
+
+# Fonts and the titled blank canvas are built once; each chart starts from a copy.
+_SCORE_FONT = ImageFont.load_default(size=48)
+_LEGEND_FONT = ImageFont.load_default(size=20)
+_CHART_BASE = Image.new('RGB', (600, 660), 'white')
+ImageDraw.Draw(_CHART_BASE).text(
+    (300, 35), 'Technical Skill Match', fill='#333333', font=ImageFont.load_default(size=28), anchor='mm'
+)
 
 def create_pie_chart(matched_count, missing_count):
-    """Generates a clean pie chart with a white background."""
-    if matched_count == 0 and missing_count == 0:
+    """Draws a donut chart of matched vs. missing technical skills with Pillow."""
+    total = matched_count + missing_count
+    if total == 0:
         return None
 
-    labels = ['Matched Technical Skills', 'Missing Technical Skills']
-    sizes = [matched_count, missing_count]
-    colors = ['#2E8B57', '#CD5C5C']
-    explode = (0.1, 0) if matched_count > 0 else (0, 0)
+    img = _CHART_BASE.copy()
+    draw = ImageDraw.Draw(img)
 
-    fig, ax = plt.subplots(figsize=(6, 6))
-    fig.patch.set_facecolor('white')
-    ax.patch.set_facecolor('white')
+    wedges = [
+        ('Matched Technical Skills', matched_count, '#2E8B57'),
+        ('Missing Technical Skills', missing_count, '#CD5C5C'),
+    ]
 
-    wedges, texts, autotexts = ax.pie(
-        sizes, explode=explode, labels=labels, colors=colors,
-        autopct='%1.1f%%', shadow=False, startangle=140,
-        textprops={'fontsize': 12, 'fontweight': 'bold'}
-    )
-    plt.setp(autotexts, size=14, weight="bold", color="white")
-    plt.setp(texts, size=12, weight="bold", color="#333333")
-    ax.axis('equal')
-    ax.set_title('Technical Skill Match', fontsize=16, fontweight='bold', pad=20)
-    
-    filepath = f"/tmp/skill_chart_{int(time.time())}.png"
-    plt.savefig(filepath, bbox_inches='tight', pad_inches=0.1)
-    plt.close(fig)
-    return filepath
+    # Wedges start at 12 o'clock and run clockwise; empty ones are not drawn.
+    start = -90
+    for _, count, color in wedges:
+        if count == 0:
+            continue
+        end = start + 360 * count / total
+        draw.pieslice((75, 80, 525, 530), start, end, fill=color)
+        start = end
+    draw.ellipse((185, 190, 415, 420), fill='white')
+    draw.text((300, 305), f'{matched_count / total * 100:.1f}%', fill='#333333', font=_SCORE_FONT, anchor='mm')
 
+    for i, (label, count, color) in enumerate(wedges):
+        y = 575 + i * 35
+        draw.rectangle((150, y - 10, 170, y + 10), fill=color)
+        draw.text((185, y), f'{label} ({count})', fill='#333333', font=_LEGEND_FONT, anchor='lm')
 
-def analyze_documents(resume_pdf, jd_pdf, progress=gr.Progress()):
-    """Orchestrates the analysis process and generates the report and chart."""
-    if not resume_pdf or not jd_pdf:
-        return None, "Please upload both your Resume and the Job Description."
-    
-    # Check for API key at the start of the process
-    if not os.environ.get('GEMINI_API_KEY'):
-         return None, "🔴 **Configuration Error**: The application's API key is not set on the server. Please contact the administrator."
+    return img
 
-    progress(0, desc="Starting Analysis...")
-    progress(0.2, desc="Extracting text from PDFs...")
-    resume_text = extract_text_from_pdf(resume_pdf)
-    jd_text = extract_text_from_pdf(jd_pdf)
 
-    progress(0.4, desc="Analyzing documents with Gemini Flash...")
-    success, data = analyze_with_gemini(resume_text, jd_text)
+def build_report(success, data):
+    """Turns an analyze_with_gemini result into the skill chart and markdown report."""
     if not success:
         return None, f"Analysis Failed: {data}"
 
@@ -132,13 +233,10 @@ def analyze_documents(resume_pdf, jd_pdf, progress=gr.Progress()):
     if not jd_technical:
         return None, "Analysis failed: Gemini could not identify any required technical skills in the Job Description."
 
-    progress(0.7, desc="Calculating score and generating visuals...")
-    matched_technical = resume_technical.intersection(jd_technical)
-    missing_technical = jd_technical.difference(resume_technical)
+    matched_technical = frozenset(skill for skill in resume_technical if skill in jd_technical)
+    missing_technical = jd_technical - matched_technical
     match_score = (len(matched_technical) / len(jd_technical)) * 100 if jd_technical else 0
-    chart_path = create_pie_chart(len(matched_technical), len(missing_technical))
-
-    progress(0.9, desc="Finding learning resources...")
+    chart = create_pie_chart(len(matched_technical), len(missing_technical))
     learning_links_md = get_learning_resources(missing_technical)
 
     # --- Build the Report ---
@@ -163,8 +261,88 @@ def analyze_documents(resume_pdf, jd_pdf, progress=gr.Progress()):
     result += f"\n\n---\n{learning_links_md}"
     result += "\n\n*Powered by Google Gemini 1.5 Flash. This is an automated guide.*"
 
+    return chart, result
+
+# Finished (chart, report) pairs keyed on the uploaded files' contents, so an
+# identical resubmission skips extraction, Gemini and rendering altogether.
+RESULT_CACHE_SIZE = 128
+_result_cache = OrderedDict()
+
+async def analyze_documents(resume_pdf, jd_pdf, progress=gr.Progress()):
+    """Orchestrates the analysis process and generates the report and chart."""
+    if not resume_pdf or not jd_pdf:
+        return None, "Please upload both your Resume and the Job Description."
+    
+    # Check for API key at the start of the process
+    if not os.environ.get('GEMINI_API_KEY'):
+         return None, "🔴 **Configuration Error**: The application's API key is not set on the server. Please contact the administrator."
+
+    try:
+        resume_digest, jd_digest = await asyncio.gather(
+            asyncio.to_thread(_file_digest, resume_pdf.name),
+            asyncio.to_thread(_file_digest, jd_pdf.name),
+        )
+        result_key = f"{resume_digest}:{jd_digest}"
+    except OSError:
+        resume_digest = jd_digest = result_key = None
+    cached = _lru_get(_result_cache, result_key)
+    if cached is not None:
+        progress(1, desc="Done!")
+        return cached
+
+    progress(0, desc="Starting Analysis...")
+    progress(0.2, desc="Extracting text from PDFs...")
+    resume_text, jd_text = await asyncio.gather(
+        asyncio.to_thread(extract_text_from_pdf, resume_pdf, resume_digest),
+        asyncio.to_thread(extract_text_from_pdf, jd_pdf, jd_digest),
+    )
+
+    progress(0.4, desc="Analyzing documents with Gemini Flash...")
+    success, data = await analyze_with_gemini(resume_text, jd_text)
+
+    progress(0.7, desc="Calculating score and generating visuals...")
+    chart, result = build_report(success, data)
+    if chart is None:
+        return None, result
+
+    if result_key is not None:
+        _lru_put(_result_cache, result_key, (chart, result), RESULT_CACHE_SIZE)
     progress(1, desc="Done!")
-    return chart_path, result
+    return chart, result
+
+async def analyze_documents_batch(resume_pdf, jd_pdfs):
+    """
+    Analyzes one resume against several job descriptions concurrently.
+    Returns a (chart, report) pair per job description, in order.
+    """
+    if not resume_pdf or not jd_pdfs:
+        return []
+
+    texts = await asyncio.gather(
+        *(asyncio.to_thread(extract_text_from_pdf, pdf) for pdf in [resume_pdf, *jd_pdfs])
+    )
+    resume_text, jd_texts = texts[0], texts[1:]
+    # analyze_with_gemini bounds in-flight requests with the shared semaphore.
+    analyses = await asyncio.gather(
+        *(analyze_with_gemini(resume_text, jd_text) for jd_text in jd_texts)
+    )
+    return [build_report(success, data) for success, data in analyses]
+
+async def analyze_documents_batch_ui(resume_pdf, jd_pdfs):
+    """Runs the batch analysis and lays it out as a chart gallery plus one combined report."""
+    if not resume_pdf or not jd_pdfs:
+        return [], "Please upload your Resume and at least one Job Description."
+    if not os.environ.get('GEMINI_API_KEY'):
+        return [], "🔴 **Configuration Error**: The application's API key is not set on the server. Please contact the administrator."
+
+    results = await analyze_documents_batch(resume_pdf, jd_pdfs)
+    gallery, sections = [], []
+    for jd_pdf, (chart, report) in zip(jd_pdfs, results):
+        jd_name = os.path.basename(jd_pdf.name)
+        if chart is not None:
+            gallery.append((chart, jd_name))
+        sections.append(f"# 📄 {jd_name}\n\n{report}")
+    return gallery, "\n\n---\n\n".join(sections)
 
 # --- GRADIO UI ---
 with gr.Blocks(theme=gr.themes.Default(primary_hue="blue"), css=".gradio-container {max-width: 1280px !important}") as iface:
@@ -185,7 +363,7 @@ with gr.Blocks(theme=gr.themes.Default(primary_hue="blue"), css=".gradio-contain
     with gr.Row():
         with gr.Column():
              gr.Markdown("### 3. Match Visualization")
-             output_chart = gr.Image(label="Technical Skills Match", show_label=False, interactive=False)
+             output_chart = gr.Image(label="Technical Skills Match", type="pil", show_label=False, interactive=False)
 
 
     analyze_btn.click(
@@ -194,4 +372,23 @@ with gr.Blocks(theme=gr.themes.Default(primary_hue="blue"), css=".gradio-contain
         outputs=[output_chart, output_report],
         api_name="analyze"
     )
-iface.launch(server_name="0.0.0.0", server_port=7860)
+
+    with gr.Accordion("Compare against several job descriptions", open=False):
+        with gr.Row(variant='panel'):
+            with gr.Column(scale=1, min_width=350):
+                jd_files = gr.File(label="Job Descriptions (PDF)", file_count="multiple")
+                analyze_batch_btn = gr.Button("Analyze Against All", variant="primary")
+
+            with gr.Column(scale=2):
+                batch_charts = gr.Gallery(label="Technical Skills Match per Job", columns=3)
+                batch_report = gr.Markdown(label="Analysis Reports")
+
+    analyze_batch_btn.click(
+        fn=analyze_documents_batch_ui,
+        inputs=[resume_file, jd_files],
+        outputs=[batch_charts, batch_report],
+        api_name="analyze_batch"
+    )
+
+if __name__ == "__main__":
+    iface.queue(default_concurrency_limit=GEMINI_CONCURRENCY, max_size=64).launch(server_name="0.0.0.0", server_port=7860)